@@ -6,17 +6,20 @@ Workflow: VSCode → MCP → Phát hiện lỗi → ChromaDB → Context → LLM
 """
 
 import asyncio
+import copy
+import functools
 import json
 import sys
 import ast
 import re
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 import logging
 import hashlib
 from datetime import datetime
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
+from collections.abc import Iterator
 import pickle
 import sqlite3
 
@@ -28,6 +31,61 @@ try:
 except ImportError:
     HAS_CHROMADB = False
 
+# Regex compile một lần khi import module, dùng lại cho mọi lần phân tích.
+# Không dùng re.ASCII: \w phải khớp được identifier Unicode.
+_DIVISION_BY_ZERO_RE = re.compile(r'\/\s*0(?![.\d])')
+_UNGUARDED_OPEN_RE = re.compile(r'open\s*\([^)]*\)(?![^{]*except)')
+_EVAL_RE = re.compile(r'\beval\s*\(')
+_BARE_EXCEPT_RE = re.compile(r'except\s*:')
+_FUNC_NAME_RE = re.compile(r'def\s+(\w+)\s*\(')
+_FUNC_SIGNATURE_RE = re.compile(r'def\s+(\w+)\s*\([^)]*\):')
+_ASSIGN_TARGET_RE = re.compile(r'\b(\w+)\s*=')
+_WORD_RE = re.compile(r'\b\w+\b')
+_OPEN_ASSIGN_RE = re.compile(r'(\s*)(\w+)\s*=\s*open\(')
+
+
+def _source_digest(code: str) -> bytes:
+    """
+    Key cache theo nội dung: digest blake2b 16 byte
+    Cache không giữ tham chiếu tới source dài, so sánh key là so 16 byte thay vì cả chuỗi
+    """
+    return hashlib.blake2b(code.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+# Kết quả check cú pháp theo digest source (LRU): None nếu hợp lệ, (message, lineno) nếu sai cú pháp.
+# Không giữ AST (lớn gấp nhiều lần source) hay SyntaxError (__traceback__ giữ frame của caller).
+_SYNTAX_CACHE_SIZE = 256
+_syntax_cache: "OrderedDict[bytes, Optional[Tuple[str, Optional[int]]]]" = OrderedDict()
+
+
+def _check_syntax(code: str) -> Optional[Tuple[str, Optional[int]]]:
+    """
+    ast.parse có cache theo source - code gửi lại nhiều lần không phải parse lại
+    Returns: None nếu hợp lệ, (message, lineno) nếu sai cú pháp
+    """
+    key = _source_digest(code)
+    if key in _syntax_cache:
+        _syntax_cache.move_to_end(key)
+        return _syntax_cache[key]
+    
+    try:
+        ast.parse(code)
+        result = None
+    except SyntaxError as e:
+        result = (str(e), e.lineno)
+    
+    _syntax_cache[key] = result
+    if len(_syntax_cache) > _SYNTAX_CACHE_SIZE:
+        _syntax_cache.popitem(last=False)
+    return result
+
+
+@functools.lru_cache(maxsize=None)
+def _read_config_file(config_file: str) -> Dict[str, Any]:
+    """Đọc và parse config.json - cache theo path, chỉ đọc đĩa một lần mỗi process"""
+    with open(config_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 
 class ConfigManager:
     """Quản lý cấu hình từ config.json"""
@@ -45,8 +103,8 @@ class ConfigManager:
             config_file = current_dir.parent / "config.json"
             
             if config_file.exists():
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                # Trả bản copy để caller sửa config không ảnh hưởng cache
+                return copy.deepcopy(_read_config_file(str(config_file)))
             else:
                 # Default config nếu không tìm thấy file
                 return {
@@ -98,50 +156,50 @@ class CodeAnalyzer:
     def __init__(self):
         self.error_patterns = {
             'division_by_zero': {
-                'regex': r'\/\s*0(?![.\d])',
+                'regex': _DIVISION_BY_ZERO_RE,
                 'severity': 'high',
                 'description': 'Potential division by zero'
             },
             'no_exception_handling': {
-                'regex': r'open\s*\([^)]*\)(?![^{]*except)',
+                'regex': _UNGUARDED_OPEN_RE,
                 'severity': 'medium', 
                 'description': 'File operation without exception handling'
             },
             'eval_usage': {
-                'regex': r'\beval\s*\(',
+                'regex': _EVAL_RE,
                 'severity': 'critical',
                 'description': 'Dangerous eval() usage'
             },
             'bare_except': {
-                'regex': r'except\s*:',
+                'regex': _BARE_EXCEPT_RE,
                 'severity': 'medium',
                 'description': 'Bare except clause'
             }
         }
     
-    def analyze_code(self, code: str) -> Dict[str, Any]:
+    def analyze_code(self, code: str, tree: Optional[ast.AST] = None) -> Dict[str, Any]:
         """
         Bước C: Phát hiện lỗi trong code Python
+        tree: AST đã parse sẵn của code (nếu có) để bỏ qua ast.parse
         Returns: {"has_errors": bool, "errors": List, "analysis": Dict}
         """
         errors = []
         
-        # Phân tích AST để check syntax
-        try:
-            ast.parse(code)
-            syntax_valid = True
-        except SyntaxError as e:
+        # Phân tích AST để check syntax (bỏ qua nếu đã có AST parse sẵn)
+        syntax_error = _check_syntax(code) if tree is None else None
+        syntax_valid = syntax_error is None
+        if syntax_error is not None:
+            message, lineno = syntax_error
             errors.append({
                 'type': 'syntax_error',
                 'severity': 'critical',
-                'description': f'Syntax error: {str(e)}',
-                'line': e.lineno
+                'description': f'Syntax error: {message}',
+                'line': lineno
             })
-            syntax_valid = False
         
         # Phân tích patterns để tìm lỗi thường gặp
         for error_type, pattern_info in self.error_patterns.items():
-            matches = re.finditer(pattern_info['regex'], code)
+            matches = pattern_info['regex'].finditer(code)
             for match in matches:
                 line_num = code[:match.start()].count('\n') + 1
                 errors.append({
@@ -171,9 +229,27 @@ class ChromaDBManager:
         self.config = config
         self.has_chromadb = HAS_CHROMADB
         self.safe_patterns = self._get_mock_patterns()
-        
-        if self.has_chromadb:
-            try:
+        # Client/collection chỉ được tạo khi thật sự query (xem property collection)
+        self.client = None
+        self._collection = None
+    
+    @property
+    def collection(self):
+        """ChromaDB collection - khởi tạo lazy ở lần truy cập đầu tiên"""
+        if self._collection is None and self.has_chromadb:
+            self._connect()
+        return self._collection
+    
+    def _connect(self):
+        """
+        Mở client và seed collection (None nếu thất bại)
+        chromadb_mode = "ephemeral" → EphemeralClient trong RAM (cho test), mặc định PersistentClient
+        """
+        try:
+            if self.config.get("chromadb_mode") == "ephemeral":
+                db_path = ":memory:"
+                self.client = chromadb.EphemeralClient()
+            else:
                 db_path = self.config.get("chromadb_path", "./py_mcp/chroma_db")
                 # Expand workspace folder nếu có
                 if "${workspaceFolder}" in db_path:
@@ -181,14 +257,19 @@ class ChromaDBManager:
                     db_path = db_path.replace("${workspaceFolder}", str(workspace))
                 
                 self.client = chromadb.PersistentClient(path=db_path)
-                self.collection = self.client.get_or_create_collection(
-                    name="python_safe_patterns"
-                )
-                self._ensure_seeded()
-                logger.info(f"ChromaDB initialized at: {db_path}")
-            except Exception as e:
-                logger.warning(f"ChromaDB init failed: {e}, using mock patterns")
-                self.has_chromadb = False
+            
+            # chromadb_hnsw: metadata HNSW tùy chọn, vd {"hnsw:M": 8} để build index nhanh hơn
+            self._collection = self.client.get_or_create_collection(
+                name="python_safe_patterns",
+                metadata=self.config.get("chromadb_hnsw")
+            )
+            self._ensure_seeded()
+            logger.info(f"ChromaDB initialized at: {db_path}")
+        except Exception as e:
+            logger.warning(f"ChromaDB init failed: {e}, using mock patterns")
+            self.has_chromadb = False
+            self.client = None
+            self._collection = None
     
     def _get_mock_patterns(self) -> Dict[str, str]:
         """Mock safe patterns khi không có ChromaDB"""
@@ -234,7 +315,7 @@ except Exception as e:
     
     def _ensure_seeded(self):
         """Seed ChromaDB với safe patterns"""
-        if not self.has_chromadb or self.collection.count() > 0:
+        if not self.has_chromadb or self._collection.count() > 0:
             return
         
         patterns = [
@@ -246,7 +327,7 @@ except Exception as e:
             for error_type, pattern in self.safe_patterns.items()
         ]
         
-        self.collection.add(
+        self._collection.add(
             documents=[p["document"] for p in patterns],
             metadatas=[p["metadata"] for p in patterns],
             ids=[p["id"] for p in patterns]
@@ -262,7 +343,7 @@ except Exception as e:
                 patterns.append(self.safe_patterns[error_type])
         
         # Nếu có ChromaDB, query thêm
-        if self.has_chromadb and error_types:
+        if self.has_chromadb and error_types and self.collection is not None:
             try:
                 results = self.collection.query(
                     query_texts=[" ".join(error_types)],
@@ -375,23 +456,57 @@ class MCPMiddleware:
 class EnhancedCodeAnalyzer(CodeAnalyzer):
     """Phát hiện lỗi code Python với context và memory awareness"""
     
+    ANALYSIS_CACHE_SIZE = 512
+    
     def __init__(self, memory_manager):
         super().__init__()
         self.memory_manager = memory_manager
+        # Cache kết quả theo (hash nội dung code, memory version) - memory thay đổi thì key cũ tự hết hiệu lực
+        self._analysis_cache = OrderedDict()
     
-    def analyze_with_context(self, code: str) -> Dict[str, Any]:
+    def analyze_with_context(self, code: str, tree: Optional[ast.AST] = None,
+                             skip_memory: bool = False) -> Dict[str, Any]:
         """
         Phân tích code với context và memory
+        skip_memory=True: chỉ chạy rule tĩnh + quality score, không tra memory (similar_contexts/recommendations rỗng)
         Returns: {"has_errors": bool, "errors": List, "analysis": Dict, "quality_score": float, "similar_contexts": List}
         """
-        analysis = self.analyze_code(code)
+        if skip_memory:
+            # Kết quả không phụ thuộc memory → không cần cache theo memory version
+            return self._analyze_uncached(code, tree, skip_memory=True)
+        
+        key = (self._code_key(code), self.memory_manager.version)
+        cached = self._analysis_cache.get(key)
+        if cached is not None:
+            self._analysis_cache.move_to_end(key)
+            return dict(cached)
+        
+        result = self._analyze_uncached(code, tree)
+        self._analysis_cache[key] = result
+        if len(self._analysis_cache) > self.ANALYSIS_CACHE_SIZE:
+            self._analysis_cache.popitem(last=False)
+        return dict(result)
+    
+    @staticmethod
+    def _code_key(code: str) -> bytes:
+        """Key cache theo nội dung - cùng digest với cache cú pháp"""
+        return _source_digest(code)
+    
+    def cache_clear(self):
+        """Xóa cache kết quả phân tích"""
+        self._analysis_cache.clear()
+    
+    def _analyze_uncached(self, code: str, tree: Optional[ast.AST] = None,
+                          skip_memory: bool = False) -> Dict[str, Any]:
+        """Phân tích thực sự, không qua cache"""
+        analysis = self.analyze_code(code, tree)
         errors = analysis["errors"]
         
         # Tính toán quality score dựa trên memory patterns
-        quality_score = self._calculate_quality_score(code)
+        quality_score = self._calculate_quality_score(code, tree)
         
         # Tìm các context tương tự từ memory
-        similar_contexts = self._find_similar_contexts(code, quality_score)
+        similar_contexts = [] if skip_memory else self._find_similar_contexts(code, quality_score)
         
         # Gợi ý cải thiện dựa trên patterns và context tương tự
         recommendations = self._generate_recommendations(similar_contexts, quality_score)
@@ -402,7 +517,11 @@ class EnhancedCodeAnalyzer(CodeAnalyzer):
             "recommendations": recommendations
         }
     
-    def _calculate_quality_score(self, code: str) -> float:
+    def analyze_with_context_ast(self, tree: ast.AST, code: str) -> Dict[str, Any]:
+        """Phân tích code đã được parse sẵn thành AST - bỏ qua bước ast.parse"""
+        return self.analyze_with_context(code, tree=tree)
+    
+    def _calculate_quality_score(self, code: str, tree: Optional[ast.AST] = None) -> float:
         """Tính toán quality score cho code với nhiều tiêu chí"""
         # Base score
         base_score = 50.0
@@ -432,7 +551,7 @@ class EnhancedCodeAnalyzer(CodeAnalyzer):
             performance_score += 5.0
         
         # 3. Safety factors
-        for error in self.analyze_code(code)["errors"]:
+        for error in self.analyze_code(code, tree)["errors"]:
             if error["severity"] == "critical":
                 safety_score -= 30.0
             elif error["severity"] == "high":
@@ -463,10 +582,10 @@ class EnhancedCodeAnalyzer(CodeAnalyzer):
         """Kiểm tra hai đoạn code có tương tự nhau không"""
         # So sánh số lượng hàm và biến chính
         def extract_functions(code: str):
-            return re.findall(r'def\s+(\w+)\s*\(', code)
+            return _FUNC_NAME_RE.findall(code)
         
         def extract_variables(code: str):
-            return re.findall(r'\b(\w+)\s*=', code)
+            return _ASSIGN_TARGET_RE.findall(code)
         
         funcs1, vars1 = extract_functions(code1), extract_variables(code1)
         funcs2, vars2 = extract_functions(code2), extract_variables(code2)
@@ -503,17 +622,26 @@ class EnhancedCodeAnalyzer(CodeAnalyzer):
 class CodeMemoryManager:
     """Quản lý bộ nhớ code và patterns chất lượng cao"""
     
-    def __init__(self, db_path: str):
+    SCHEMA_VERSION = 1  # Lưu trong PRAGMA user_version
+    CONTEXT_WINDOW_SIZE = 50  # Mặc định số context gần nhất giữ trong RAM
+    
+    def __init__(self, db_path: str, context_window_size: Optional[int] = None):
         self.db_path = db_path
-        self.context_window = deque(maxlen=50)  # 50 context gần nhất
+        # Cửa sổ cố định: context cũ nhất bị đẩy ra, SQLite mới là nguồn dữ liệu đầy đủ
+        self.context_window = deque(maxlen=context_window_size or self.CONTEXT_WINDOW_SIZE)
         self.quality_patterns = []
+        self.version = 0  # Tăng mỗi khi context window thay đổi (dùng để invalidate cache)
         
         # Kết nối SQLite để lưu trữ patterns và context
-        self.conn = sqlite3.connect(self.db_path)
+        # db_path dạng "file:...?mode=memory&cache=shared" được mở như URI (DB trong RAM)
+        self.conn = sqlite3.connect(self.db_path, uri=self.db_path.startswith("file:"))
         self._init_db()
     
     def _init_db(self):
-        """Khởi tạo cơ sở dữ liệu"""
+        """Khởi tạo cơ sở dữ liệu (bỏ qua DDL nếu schema đã được tạo)"""
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= self.SCHEMA_VERSION:
+            return
+        
         with self.conn:
             self.conn.execute("""
                 CREATE TABLE IF NOT EXISTS code_history (
@@ -535,38 +663,62 @@ class CodeMemoryManager:
                     FOREIGN KEY (context_id) REFERENCES code_history (id)
                 )
             """)
+            
+            self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
     
     def add_code_context(self, original_code: str, safe_code: str, quality_score: float, patterns: List[str]):
         """Thêm context code vào bộ nhớ"""
         with self.conn:
-            cursor = self.conn.execute("""
-                INSERT INTO code_history (original_code, safe_code, quality_score)
-                VALUES (?, ?, ?)
-            """, (original_code, safe_code, quality_score))
-            
-            context_id = cursor.lastrowid
-              # Thêm các patterns chất lượng cao liên quan
-            for pattern in patterns:
-                if isinstance(pattern, dict):
-                    self.conn.execute("""
-                        INSERT INTO quality_patterns (pattern_type, pattern_code, quality_score, context_id)
-                        VALUES (?, ?, ?, ?)
-                    """, (pattern["type"], pattern["code"], quality_score, context_id))
-                else:
-                    # Pattern là string đơn giản
-                    self.conn.execute("""
-                        INSERT INTO quality_patterns (pattern_type, pattern_code, quality_score, context_id)
-                        VALUES (?, ?, ?, ?)
-                    """, (str(pattern), "", quality_score, context_id))
-            
-            # Cập nhật bộ nhớ
-            self.context_window.append({
-                "id": context_id,
-                "code": original_code,
-                "safe_code": safe_code,
-                "score": quality_score,
-                "patterns": patterns
-            })
+            self._insert_code_context(original_code, safe_code, quality_score, patterns)
+    
+    def add_code_contexts_bulk(self, rows: List[tuple]):
+        """
+        Thêm nhiều context trong một transaction duy nhất
+        rows: List[(original_code, safe_code, quality_score, patterns)]
+        """
+        with self.conn:
+            for original_code, safe_code, quality_score, patterns in rows:
+                self._insert_code_context(original_code, safe_code, quality_score, patterns)
+    
+    def _insert_code_context(self, original_code: str, safe_code: str, quality_score: float, patterns: List[str]):
+        """Insert một context - caller chịu trách nhiệm transaction"""
+        cursor = self.conn.execute("""
+            INSERT INTO code_history (original_code, safe_code, quality_score)
+            VALUES (?, ?, ?)
+        """, (original_code, safe_code, quality_score))
+        
+        context_id = cursor.lastrowid
+        # Thêm các patterns chất lượng cao liên quan
+        # (pattern là dict {"type", "code"} hoặc string đơn giản)
+        self.conn.executemany("""
+            INSERT INTO quality_patterns (pattern_type, pattern_code, quality_score, context_id)
+            VALUES (?, ?, ?, ?)
+        """, [
+            (pattern["type"], pattern["code"], quality_score, context_id)
+            if isinstance(pattern, dict)
+            else (str(pattern), "", quality_score, context_id)
+            for pattern in patterns
+        ])
+        
+        # Cập nhật bộ nhớ
+        self.context_window.append({
+            "id": context_id,
+            "code": original_code,
+            "safe_code": safe_code,
+            "score": quality_score,
+            "patterns": patterns
+        })
+        self.version += 1
+    
+    def reset(self):
+        """Xóa toàn bộ context và patterns đã học (giữ nguyên schema và kết nối)"""
+        with self.conn:
+            self.conn.execute("DELETE FROM quality_patterns")
+            self.conn.execute("DELETE FROM code_history")
+        
+        self.context_window.clear()
+        self.quality_patterns.clear()
+        self.version += 1
     
     def learn_quality_pattern(self, pattern_type: str, pattern_code: str, quality_score: float):
         """Học một pattern chất lượng cao mới"""
@@ -612,7 +764,7 @@ class CodeMemoryManager:
         similar = []
         
         # Simple similarity based on common keywords and structure
-        code_keywords = set(re.findall(r'\b\w+\b', code.lower()))
+        code_keywords = set(_WORD_RE.findall(code.lower()))
         
         cursor = self.conn.execute("""
             SELECT id, original_code, safe_code, quality_score
@@ -622,7 +774,7 @@ class CodeMemoryManager:
         """)
         
         for row in cursor.fetchall():
-            context_keywords = set(re.findall(r'\b\w+\b', row[1].lower()))
+            context_keywords = set(_WORD_RE.findall(row[1].lower()))
             
             # Calculate Jaccard similarity
             intersection = len(code_keywords.intersection(context_keywords))
@@ -735,7 +887,7 @@ class EnhancedMCPMiddleware(MCPMiddleware):
         # Example: If similar context uses type hints, suggest adding them
         if "def " in code and ":" in context["safe"] and "->" in context["safe"]:
             # Simple pattern matching for function signatures
-            functions = re.findall(r'def\s+(\w+)\s*\([^)]*\):', code)
+            functions = _FUNC_SIGNATURE_RE.findall(code)
             for func_name in functions:
                 if f"def {func_name}" in code and f"def {func_name}" not in code.replace(":", " -> "):
                     logger.info(f"Suggestion: Add type hints to function {func_name}")
@@ -750,11 +902,7 @@ class EnhancedMCPMiddleware(MCPMiddleware):
         if rec_type == "no_exception_handling" and "with open" in rec_code:
             # Prefer context manager pattern from recommendations
             if "open(" in code and "with" not in code:
-                code = re.sub(
-                    r'(\s*)(\w+)\s*=\s*open\(',
-                    r'\1with open(',
-                    code
-                )
+                code = _OPEN_ASSIGN_RE.sub(r'\1with open(', code)
         
         return code
 
@@ -765,8 +913,15 @@ class PythonCodeQualityServer:
     Workflow: VSCode → MCP → Phát hiện lỗi → ChromaDB → Context → LLM → Safe Code
     """
     
-    def __init__(self):
-        self.config = ConfigManager()
+    # Vị trí memory DB mặc định - giữ nguyên để history đã học không bị bỏ lại
+    DEFAULT_MEMORY_DB_PATH = "./py_mcp/code_memory.db"
+    
+    def __init__(self, config: Optional[ConfigManager] = None, memory_db_path: Optional[str] = None):
+        """
+        memory_db_path: đường dẫn SQLite của memory (vd thư mục tạm hoặc URI "file:..." khi test)
+        None → DEFAULT_MEMORY_DB_PATH, context window giữ mặc định của CodeMemoryManager
+        """
+        self.config = config or ConfigManager()
         server_info = self.config.get("server", {})
         
         self.name = server_info.get("name", "python-code-quality")
@@ -776,20 +931,50 @@ class PythonCodeQualityServer:
         # Initialize components theo config
         self.chroma_manager = ChromaDBManager(self.config)
           # Initialize memory manager
-        db_path = "./py_mcp/code_memory.db"
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        db_path = memory_db_path or self.DEFAULT_MEMORY_DB_PATH
+        # Ensure directory exists (URI "file:..." là DB trong RAM, không có thư mục)
+        if not db_path.startswith("file:"):
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
         self.memory_manager = CodeMemoryManager(db_path)
           # Use enhanced middleware
         self.middleware = EnhancedMCPMiddleware(self.chroma_manager, self.config, self.memory_manager)
         
         logger.info(f"Enhanced server initialized with memory at: {db_path}")
     
-    async def handle_validate_code(self, arguments: Dict[str, Any]) -> str:
-        """Enhanced validate_code với memory và context awareness"""
+    async def _validate_code(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Enhanced validate_code với memory và context awareness
+        code: str; khi gọi in-process còn nhận bytes UTF-8 hoặc iterator/generator các chunk str (ghép lại một lần).
+        Chỉ nhận Iterator: list (JSON array) hay set/dict_keys (không có thứ tự) bị từ chối, không ghép ngầm.
+        """
         code = arguments.get("code", "")
+        try:
+            if isinstance(code, (bytes, bytearray, memoryview)):
+                code = str(code, "utf-8")
+            elif not isinstance(code, str):
+                if not isinstance(code, Iterator):
+                    raise TypeError(f"'code' must be a string, got {type(code).__name__}")
+                chunks = list(code)
+                if not all(isinstance(chunk, str) for chunk in chunks):
+                    raise TypeError("'code' chunks must all be strings")
+                code = "".join(chunks)
+        except (TypeError, UnicodeDecodeError) as e:
+            return {"error": f"Invalid code argument: {e}"}
         if not code.strip():
-            return json.dumps({"error": "No code provided"}, indent=2)
+            return {"error": "No code provided"}
+        
+        # Fast path: chỉ có comment → không có gì để phân tích hay học
+        if all(line.lstrip().startswith("#") for line in code.splitlines() if line.strip()):
+            return {
+                "status": "safe",
+                "message": "Code contains only comments - nothing to analyze",
+                "original_code": code,
+                "empty": True,
+                "server": {
+                    "name": self.name,
+                    "version": self.version
+                }
+            }
         
         try:
             # Bước C: Enhanced analysis với context
@@ -806,7 +991,7 @@ class PythonCodeQualityServer:
                 # Store in memory for future context
                 self.memory_manager.add_code_context(code, code, analysis["quality_score"], [])
                 
-                return json.dumps({
+                return {
                     "status": "safe",
                     "message": "Code is already safe - no issues detected",
                     "original_code": code,
@@ -821,7 +1006,7 @@ class PythonCodeQualityServer:
                         "name": self.name,
                         "version": self.version
                     }
-                }, indent=2)
+                }
             
             # Có lỗi → Enhanced workflow
             
@@ -855,7 +1040,7 @@ class PythonCodeQualityServer:
                     )
             
             # Bước G: Enhanced result
-            return json.dumps({
+            return {
                 "status": "improved",
                 "message": f"Fixed {len(analysis['errors'])} issues with {improvement_score:.1f} quality improvement",
                 "original_code": code,
@@ -879,19 +1064,19 @@ class PythonCodeQualityServer:
                     "name": self.name,
                     "version": self.version
                 }
-            }, indent=2)
+            }
             
         except Exception as e:
             logger.error(f"Error during enhanced validation: {e}")
-            return json.dumps({"error": f"Enhanced validation failed: {str(e)}"}, indent=2)
+            return {"error": f"Enhanced validation failed: {str(e)}"}
     
-    async def handle_learn_from_code(self, arguments: Dict[str, Any]) -> str:
+    async def _learn_from_code(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """New tool: Learn từ high-quality code examples"""
         code = arguments.get("code", "")
         quality_score = arguments.get("quality_score", 85.0)
         
         if not code.strip():
-            return json.dumps({"error": "No code provided"}, indent=2)
+            return {"error": "No code provided"}
         
         try:
             # Analyze quality patterns
@@ -907,20 +1092,20 @@ class PythonCodeQualityServer:
             self.memory_manager.add_code_context(code, code, quality_score, 
                 [pattern["code"] for pattern in analysis["quality_patterns"]])
             
-            return json.dumps({
+            return {
                 "status": "learned",
                 "message": f"Learned {len(analysis['quality_patterns'])} quality patterns",
                 "code": code,
                 "quality_score": quality_score,
                 "patterns_learned": analysis["quality_patterns"],
                 "memory_size": len(self.memory_manager.context_window)
-            }, indent=2)
+            }
             
         except Exception as e:
             logger.error(f"Error learning from code: {e}")
-            return json.dumps({"error": f"Learning failed: {str(e)}"}, indent=2)
+            return {"error": f"Learning failed: {str(e)}"}
     
-    async def handle_get_context_insights(self, arguments: Dict[str, Any]) -> str:
+    async def _get_context_insights(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """New tool: Get context insights và memory statistics"""
         try:
             # Memory statistics
@@ -942,7 +1127,7 @@ class PythonCodeQualityServer:
             """)
             pattern_stats = cursor.fetchall()
             
-            return json.dumps({
+            return {
                 "context_insights": {
                     "active_memory_size": total_contexts,
                     "total_code_history": total_history,
@@ -957,14 +1142,41 @@ class PythonCodeQualityServer:
                     ]
                 },
                 "memory_status": "active",
-                "learning_capacity": "50 recent contexts + unlimited history"
-            }, indent=2)
+                "learning_capacity": f"{self.memory_manager.context_window.maxlen} recent contexts + unlimited history"
+            }
             
         except Exception as e:
             logger.error(f"Error getting context insights: {e}")
-            return json.dumps({"error": f"Context insights failed: {str(e)}"}, indent=2)
+            return {"error": f"Context insights failed: {str(e)}"}
+    
+    async def handle_validate_code(self, arguments: Dict[str, Any]) -> str:
+        """validate_code tool - kết quả dạng JSON text"""
+        return json.dumps(await self._validate_code(arguments), indent=2)
+    
+    async def handle_learn_from_code(self, arguments: Dict[str, Any]) -> str:
+        """learn_from_code tool - kết quả dạng JSON text"""
+        return json.dumps(await self._learn_from_code(arguments), indent=2)
+    
+    async def handle_get_context_insights(self, arguments: Dict[str, Any]) -> str:
+        """get_context_insights tool - kết quả dạng JSON text"""
+        return json.dumps(await self._get_context_insights(arguments), indent=2)
+    
     async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
-        """Xử lý request theo JSON-RPC 2.0"""
+        """Xử lý request theo JSON-RPC 2.0 (tool result được serialize thành JSON text)"""
+        response = await self.handle_request_raw(request)
+        result = response.get("result")
+        if result and "content" in result:
+            result["content"] = [
+                {"type": "text", "text": json.dumps(item["data"], indent=2)} if "data" in item else item
+                for item in result["content"]
+            ]
+        return response
+
+    async def handle_request_raw(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Xử lý request theo JSON-RPC 2.0, giữ tool result dạng dict
+        content[0]["data"] chứa dict kết quả - tránh json.dumps/json.loads khi gọi in-process
+        """
         try:
             method = request.get("method")
             params = request.get("params", {})
@@ -1029,11 +1241,11 @@ class PythonCodeQualityServer:
                 arguments = params.get("arguments", {})
 
                 if tool_name == "validate_code":
-                    result = await self.handle_validate_code(arguments)
+                    result = await self._validate_code(arguments)
                 elif tool_name == "learn_from_code":
-                    result = await self.handle_learn_from_code(arguments)
+                    result = await self._learn_from_code(arguments)
                 elif tool_name == "get_context_insights":
-                    result = await self.handle_get_context_insights(arguments)
+                    result = await self._get_context_insights(arguments)
                 else:
                     raise ValueError(f"Unknown tool: {tool_name}")
 
@@ -1041,7 +1253,7 @@ class PythonCodeQualityServer:
                     "jsonrpc": "2.0",
                     "id": req_id,
                     "result": {
-                        "content": [{"type": "text", "text": result}]
+                        "content": [{"type": "json", "data": result}]
                     }
                 }
 
@@ -1059,6 +1271,39 @@ class PythonCodeQualityServer:
                 }
             }
 
+    async def handle_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Xử lý JSON-RPC 2.0 batch: nhiều request trong một message, trả về list response
+        Request không có id (notification) vẫn được xử lý nhưng không có trong kết quả
+        """
+        if not requests:
+            return [{
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {
+                    "code": -32600,
+                    "message": "Invalid Request: empty batch"
+                }
+            }]
+        
+        responses = []
+        for request in requests:
+            if not isinstance(request, dict):
+                responses.append({
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {
+                        "code": -32600,
+                        "message": "Invalid Request"
+                    }
+                })
+                continue
+            
+            response = await self.handle_request(request)
+            if "id" in request:
+                responses.append(response)
+        return responses
+
     async def run_stdio(self):
         """Chạy server qua STDIO"""
         logger.info(f"Python Code Quality MCP Server {self.name} v{self.version} started")
@@ -1073,7 +1318,13 @@ class PythonCodeQualityServer:
 
                 try:
                     request = json.loads(line.strip())
-                    response = await self.handle_request(request)
+                    if isinstance(request, list):
+                        response = await self.handle_batch(request)
+                        # Batch toàn notification → JSON-RPC 2.0: không trả gì cả
+                        if not response:
+                            continue
+                    else:
+                        response = await self.handle_request(request)
 
                     sys.stdout.write(json.dumps(response) + "\n")
                     sys.stdout.flush()
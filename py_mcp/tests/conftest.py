@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Fixtures pytest dùng chung cho các test module
+Memory/analyzer tạo một lần mỗi session (mỗi xdist worker) - test nào ghi vào memory thì dùng clean_analyzer
+"""
+
+import functools
+import os
+import sys
+
+import pytest
+
+# pytest-socket (optional): chặn network để cấu hình sai (vd embedding endpoint) không âm thầm gọi ra ngoài
+try:
+    from pytest_socket import socket_allow_hosts
+except ImportError:
+    socket_allow_hosts = None
+
+# Không ghi .pyc cho server/test modules - test chạy ngắn, ghi bytecode chỉ tốn I/O
+sys.dont_write_bytecode = True
+
+# Add src to path (một lần khi collect); thư mục tests cho module dùng chung như samples.py
+# vì --import-mode=importlib không tự thêm thư mục của test file vào sys.path
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'src'))
+sys.path.insert(0, TESTS_DIR)
+
+from server import CodeMemoryManager, EnhancedCodeAnalyzer
+
+
+def pytest_runtest_setup(item):
+    """
+    Chặn kết nối mạng ra ngoài cho mọi test (trừ @pytest.mark.enable_socket)
+    Loopback vẫn cho phép: event loop trên Windows dựng self-pipe bằng TCP socketpair qua 127.0.0.1
+    """
+    if socket_allow_hosts is not None and item.get_closest_marker("enable_socket") is None:
+        socket_allow_hosts(["127.0.0.1", "::1"], allow_unix_socket=True)
+
+
+@functools.lru_cache(maxsize=None)
+def build_large_code(n: int) -> str:
+    """Sinh file code gồm n hàm nhỏ - cache theo n, mỗi kích thước chỉ sinh một lần mỗi worker"""
+    return "\n".join(
+        f"def function_{i}():\n    '''Function number {i}'''\n    return {i} * 2\n"
+        for i in range(n)
+    )
+
+
+@pytest.fixture
+def large_code(request):
+    """Code lớn cho test hiệu năng - số hàm lấy từ parametrize(indirect=True), mặc định 1000"""
+    return build_large_code(getattr(request, "param", 1000))
+
+
+@pytest.fixture(scope="session")
+def shared_memory():
+    """
+    CodeMemoryManager dùng chung cho cả session - chỉ dành cho test read-only
+    SQLite nằm hẳn trong RAM (shared cache), tên DB theo xdist worker để các worker không dùng chung
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    memory_manager = CodeMemoryManager(f"file:test_memdb_{worker}?mode=memory&cache=shared")
+    memory_manager.conn.execute("PRAGMA journal_mode=MEMORY")
+    memory_manager.conn.execute("PRAGMA synchronous=OFF")
+    yield memory_manager
+    memory_manager.conn.close()
+
+
+@pytest.fixture(scope="session")
+def warm_analyzer(shared_memory):
+    """
+    EnhancedCodeAnalyzer gắn với shared_memory, dựng một lần mỗi worker
+    Chạy thử một snippet để các đường phân tích (AST, regex, quality score) đã nóng trước test đầu tiên
+    """
+    analyzer = EnhancedCodeAnalyzer(shared_memory)
+    analyzer.analyze_with_context("def warm_up(x: int) -> int:\n    return x\n")
+    analyzer.cache_clear()
+    return analyzer
+
+
+@pytest.fixture
+def clean_analyzer(warm_analyzer):
+    """
+    warm_analyzer cho test có ghi vào memory - sau test reset memory và xóa cache
+    để test sau (kể cả read-only) vẫn thấy memory rỗng
+    """
+    yield warm_analyzer
+    warm_analyzer.memory_manager.reset()
+    warm_analyzer.cache_clear()
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Code samples dùng chung cho các test module
+Nội dung nằm trong tests/fixtures/*.py.txt, chỉ đọc từ đĩa lần đầu được dùng
+"""
+
+import functools
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+@functools.lru_cache(maxsize=None)
+def load(name: str) -> str:
+    """Đọc sample `name` (tên file không có đuôi .py.txt) - cache theo tên"""
+    return (FIXTURES_DIR / f"{name}.py.txt").read_text(encoding="utf-8")
@@ -5,28 +5,50 @@ Kiểm tra server với các trường hợp thực tế và so sánh với huma
 """
 
 import unittest
+import ast
+import logging
 import os
 import tempfile
-import shutil
-import asyncio
-import time
-import json
-from typing import Dict, List, Any
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from server import (
-    ConfigManager, ChromaDBManager, MCPMiddleware, 
-    CodeMemoryManager, EnhancedCodeAnalyzer, PythonCodeQualityServer
+from server import ConfigManager, CodeMemoryManager, EnhancedCodeAnalyzer
+import samples
+
+# Kết quả chi tiết log ở DEBUG - im lặng mặc định, bật bằng --log-cli-level=DEBUG
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+# Parse AST một lần khi import module, dùng chung key với samples.load
+_SAMPLE_NAMES = (
+    "django_view",
+    "data_science_notebook",
+    "fastapi_server",
+    "security_vulnerable",
+    "performance_bad",
 )
+_PRECOMPILED = {name: ast.parse(samples.load(name)) for name in _SAMPLE_NAMES}
+
+
+class _Thresh:
+    """Ngưỡng quality_score mong đợi - chỉnh ở đây, không sửa trong từng test"""
+    DJANGO_MIN = 40.0
+    FASTAPI_MIN = 70.0
+    VULN_MAX = 60.0
 
 
 class TestRealWorldScenarios(unittest.TestCase):
     """Test với real-world code scenarios"""
     
+    @classmethod
+    def setUpClass(cls):
+        # Config chỉ đọc một lần cho cả class
+        cls.config = ConfigManager()
+    
     def setUp(self):
-        self.test_db = tempfile.mktemp(suffix=".db")
-        self.config = ConfigManager()
+        self._tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        self._tmp.close()
+        self.test_db = self._tmp.name
         
     def tearDown(self):
         if os.path.exists(self.test_db):
@@ -34,76 +56,30 @@ class TestRealWorldScenarios(unittest.TestCase):
     
     def test_django_view_code_quality(self):
         """Test: Django view với common patterns"""
-        django_code = """
-from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
-import json
-
-@csrf_exempt
-def user_api(request):
-    if request.method == 'POST':
-        data = json.loads(request.body)
-        user = User.objects.create(
-            name=data['name'],
-            email=data['email']
-        )
-        return JsonResponse({'id': user.id})
-    else:
-        users = User.objects.all()
-        return JsonResponse({'users': [u.name for u in users]})
-"""
-        
         memory_manager = CodeMemoryManager(self.test_db)
         analyzer = EnhancedCodeAnalyzer(memory_manager)
         
-        analysis = analyzer.analyze_with_context(django_code)
+        analysis = analyzer.analyze_with_context_ast(_PRECOMPILED["django_view"], samples.load("django_view"))
         
         # Django code should detect some issues: no validation, no error handling
         self.assertTrue(analysis["has_errors"], "Django code should detect validation issues")
         
         # But should have decent quality score for structure
-        self.assertGreater(analysis["quality_score"], 40.0, "Django code should have reasonable structure score")
+        self.assertGreater(analysis["quality_score"], _Thresh.DJANGO_MIN, "Django code should have reasonable structure score")
         
-        print(f"Django view quality: {analysis['quality_score']}")
-        print(f"Detected issues: {len(analysis['errors'])}")
+        log.debug(f"Django view quality: {analysis['quality_score']}")
+        log.debug(f"Detected issues: {len(analysis['errors'])}")
     
     def test_data_science_notebook_code(self):
         """Test: Data science code với pandas/numpy"""
-        ds_code = """
-import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split
-
-def analyze_dataset(file_path):
-    # Load data
-    df = pd.read_csv(file_path)
-    
-    # Basic analysis
-    print(df.shape)
-    print(df.describe())
-    
-    # Handle missing values
-    df = df.dropna()
-    
-    # Feature engineering
-    X = df.drop('target', axis=1)
-    y = df['target']
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
-    
-    return X_train, X_test, y_train, y_test
-"""
-        
         memory_manager = CodeMemoryManager(self.test_db)
         analyzer = EnhancedCodeAnalyzer(memory_manager)
         
-        analysis = analyzer.analyze_with_context(ds_code)
+        analysis = analyzer.analyze_with_context_ast(_PRECOMPILED["data_science_notebook"], samples.load("data_science_notebook"))
         
         # DS code might have some issues (no error handling for file operations)
-        print(f"Data Science code quality: {analysis['quality_score']}")
-        print(f"Issues: {[e['message'] for e in analysis['errors']]}")
+        log.debug(f"Data Science code quality: {analysis['quality_score']}")
+        log.debug(f"Issues: {[e['message'] for e in analysis['errors']]}")
         
         # Should detect file operation issues
         file_errors = [e for e in analysis['errors'] if 'file' in e['message'].lower()]
@@ -111,53 +87,25 @@ def analyze_dataset(file_path):
     
     def test_api_server_code(self):
         """Test: FastAPI server code"""
-        fastapi_code = """
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List
-import uvicorn
-
-app = FastAPI()
-
-class User(BaseModel):
-    name: str
-    email: str
-    age: int
-
-users_db = []
-
-@app.post("/users/", response_model=User)
-async def create_user(user: User):
-    if user.age < 0:
-        raise HTTPException(status_code=400, detail="Age cannot be negative")
-    users_db.append(user)
-    return user
-
-@app.get("/users/", response_model=List[User])
-async def get_users():
-    return users_db
-
-if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
-"""
-        
         memory_manager = CodeMemoryManager(self.test_db)
         analyzer = EnhancedCodeAnalyzer(memory_manager)
         
-        analysis = analyzer.analyze_with_context(fastapi_code)
+        analysis = analyzer.analyze_with_context_ast(_PRECOMPILED["fastapi_server"], samples.load("fastapi_server"))
         
         # FastAPI code should be pretty good
-        self.assertGreater(analysis["quality_score"], 70.0, "FastAPI code should have good quality")
+        self.assertGreater(analysis["quality_score"], _Thresh.FASTAPI_MIN, "FastAPI code should have good quality")
         
-        print(f"FastAPI server quality: {analysis['quality_score']}")
-        print(f"Issues: {[e['message'] for e in analysis['errors']]}")
+        log.debug(f"FastAPI server quality: {analysis['quality_score']}")
+        log.debug(f"Issues: {[e['message'] for e in analysis['errors']]}")
 
 
 class TestHumanExpertComparison(unittest.TestCase):
     """So sánh kết quả server với human expert judgment"""
     
     def setUp(self):
-        self.test_db = tempfile.mktemp(suffix=".db")
+        self._tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        self._tmp.close()
+        self.test_db = self._tmp.name
         
     def tearDown(self):
         if os.path.exists(self.test_db):
@@ -165,91 +113,49 @@ class TestHumanExpertComparison(unittest.TestCase):
     
     def test_expert_vs_server_security_issues(self):
         """Test: So sánh server detection vs expert knowledge về security"""
-        
         # Code với security issues mà expert sẽ bắt được
-        security_vulnerable_code = """
-import os
-import subprocess
-
-def execute_command(user_input):
-    # SECURITY ISSUE: Command injection
-    result = os.system(f"ls {user_input}")
-    return result
-
-def read_user_file(filename):
-    # SECURITY ISSUE: Path traversal
-    with open(f"/uploads/{filename}", 'r') as f:
-        return f.read()
-
-def unsafe_pickle_load(data):
-    # SECURITY ISSUE: Pickle deserialization
-    import pickle
-    return pickle.loads(data)
-"""
-        
         memory_manager = CodeMemoryManager(self.test_db)
         analyzer = EnhancedCodeAnalyzer(memory_manager)
         
-        analysis = analyzer.analyze_with_context(security_vulnerable_code)
+        analysis = analyzer.analyze_with_context_ast(_PRECOMPILED["security_vulnerable"], samples.load("security_vulnerable"))
         
         # Expert judgment: this code has critical security issues
         expert_score = 20.0  # Expert would rate this very low
         
-        print(f"Expert judgment: {expert_score}")
-        print(f"Server score: {analysis['quality_score']}")
+        log.debug(f"Expert judgment: {expert_score}")
+        log.debug(f"Server score: {analysis['quality_score']}")
         
         # Server should detect some issues but might miss security implications
-        self.assertLess(analysis["quality_score"], 60.0, "Server should detect issues in vulnerable code")
+        self.assertLess(analysis["quality_score"], _Thresh.VULN_MAX, "Server should detect issues in vulnerable code")
         
         # Check if server detected os.system usage
         os_errors = [e for e in analysis['errors'] if 'os.system' in e.get('message', '').lower()]
-        print(f"Server detected os.system issues: {len(os_errors)}")
+        log.debug(f"Server detected os.system issues: {len(os_errors)}")
     
     def test_expert_vs_server_performance_issues(self):
         """Test: So sánh về performance issues"""
-        
         # Code với performance issues
-        performance_bad_code = """
-def find_duplicates(large_list):
-    duplicates = []
-    for i, item in enumerate(large_list):
-        for j, other_item in enumerate(large_list):
-            if i != j and item == other_item and item not in duplicates:
-                duplicates.append(item)
-    return duplicates
-
-def inefficient_search(data, target):
-    # O(n) search in unsorted list when could use dict/set
-    for item in data:
-        if item == target:
-            return True
-    return False
-
-def memory_wasteful_function():
-    # Creates unnecessary large objects
-    huge_list = [i for i in range(1000000)]
-    return len(huge_list)
-"""
-        
         memory_manager = CodeMemoryManager(self.test_db)
         analyzer = EnhancedCodeAnalyzer(memory_manager)
         
-        analysis = analyzer.analyze_with_context(performance_bad_code)
+        analysis = analyzer.analyze_with_context_ast(_PRECOMPILED["performance_bad"], samples.load("performance_bad"))
         
         expert_score = 30.0  # Expert: bad performance, but structurally ok
         
-        print(f"Performance code - Expert: {expert_score}, Server: {analysis['quality_score']}")
+        log.debug(f"Performance code - Expert: {expert_score}, Server: {analysis['quality_score']}")
         
         # Server might not catch performance issues as well as experts
         # This is a known limitation
-        print(f"Server detected issues: {[e['type'] for e in analysis['errors']]}")
+        log.debug(f"Server detected issues: {[e['type'] for e in analysis['errors']]}")
 
 
 class TestServerEvolution(unittest.TestCase):
     """Test khả năng học và evolution của server"""
     
     def setUp(self):
-        self.test_db = tempfile.mktemp(suffix=".db")
+        self._tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        self._tmp.close()
+        self.test_db = self._tmp.name
         
     def tearDown(self):
         if os.path.exists(self.test_db):
@@ -297,9 +203,9 @@ def double_numbers(nums):
         # Server should suggest improvements based on learned patterns
         recommendations = analysis.get("recommendations", [])
         
-        print(f"Learned patterns applied: {len(recommendations)}")
+        log.debug(f"Learned patterns applied: {len(recommendations)}")
         for rec in recommendations:
-            print(f"- {rec}")
+            log.debug(f"- {rec}")
         
         # Should have some recommendations
         self.assertGreater(len(recommendations), 0, "Server should provide recommendations based on learning")
@@ -308,19 +214,85 @@ def double_numbers(nums):
         """Test: Context window có được quản lý hiệu quả không?"""
         memory_manager = CodeMemoryManager(self.test_db)
         
-        # Add many contexts to test window management
+        # Add many contexts to test window management (một transaction duy nhất)
+        rows = []
         for i in range(50):
             code = f"def func_{i}(): return {i}"
-            memory_manager.add_code_context(code, code, 80.0 + i % 20, [f"pattern_{i % 5}"])
+            rows.append((code, code, 80.0 + i % 20, [f"pattern_{i % 5}"]))
+        memory_manager.add_code_contexts_bulk(rows)
         
         # Check memory insights
         insights = memory_manager.get_context_insights()
         
-        print(f"Memory insights: {insights}")
+        log.debug(f"Memory insights: {insights}")
         
         # Memory should be managed efficiently
         self.assertLess(insights["memory_size"], 100, "Memory window should be bounded")
+        self.assertLessEqual(insights["memory_size"], memory_manager.context_window.maxlen)
         self.assertEqual(insights["total_contexts"], 50, "All contexts should be stored in DB")
+    
+    def test_context_window_evicts_oldest(self):
+        """Test: Vượt quá kích thước cửa sổ thì context cũ nhất bị loại, DB vẫn giữ đủ"""
+        memory_manager = CodeMemoryManager(self.test_db, context_window_size=5)
+        
+        memory_manager.add_code_contexts_bulk(
+            [(f"x = {i}", f"x = {i}", 80.0, []) for i in range(8)]
+        )
+        
+        self.assertEqual(len(memory_manager.context_window), 5)
+        self.assertEqual(memory_manager.context_window[0]["code"], "x = 3")
+        self.assertEqual(memory_manager.get_context_insights()["total_contexts"], 8)
+    
+    def test_skip_memory_ignores_learned_contexts(self):
+        """Test: skip_memory=True cho cùng kết quả rule tĩnh nhưng không tra memory"""
+        memory_manager = CodeMemoryManager(self.test_db)
+        analyzer = EnhancedCodeAnalyzer(memory_manager)
+        
+        code = "def double(nums):\n    result = [n * 2 for n in nums]\n    return result\n"
+        memory_manager.add_code_context(code, code, 95.0, ["list_comprehension"])
+        
+        with_memory = analyzer.analyze_with_context(code)
+        static_only = analyzer.analyze_with_context(code, skip_memory=True)
+        
+        self.assertEqual(len(with_memory["similar_contexts"]), 1)
+        self.assertEqual(static_only["similar_contexts"], [])
+        self.assertEqual(static_only["recommendations"], [])
+        self.assertEqual(static_only["errors"], with_memory["errors"])
+        self.assertEqual(static_only["quality_score"], with_memory["quality_score"])
+    
+    def test_reset_clears_memory(self):
+        """Test: reset() xóa sạch context trong RAM lẫn DB nhưng vẫn dùng tiếp được"""
+        memory_manager = CodeMemoryManager(self.test_db)
+        memory_manager.add_code_context("x = 1", "x = 1", 80.0, ["simple"])
+        version = memory_manager.version
+        
+        memory_manager.reset()
+        
+        self.assertEqual(len(memory_manager.context_window), 0)
+        self.assertEqual(memory_manager.get_context_insights()["total_contexts"], 0)
+        self.assertEqual(memory_manager.get_quality_recommendations(["simple"]), [])
+        self.assertGreater(memory_manager.version, version)
+        
+        memory_manager.add_code_context("y = 2", "y = 2", 80.0, [])
+        self.assertEqual(memory_manager.get_context_insights()["total_contexts"], 1)
+    
+    def test_analysis_cache_invalidated_by_learning(self):
+        """Test: Cache phân tích không trả kết quả cũ sau khi memory học thêm"""
+        memory_manager = CodeMemoryManager(self.test_db)
+        analyzer = EnhancedCodeAnalyzer(memory_manager)
+        
+        code = "def double(nums):\n    result = [n * 2 for n in nums]\n    return result\n"
+        
+        first = analyzer.analyze_with_context(code)
+        second = analyzer.analyze_with_context(code)
+        self.assertEqual(first, second, "Repeated analysis should return the cached result")
+        self.assertEqual(first["similar_contexts"], [])
+        
+        # Học thêm context tương tự → kết quả phải được tính lại
+        memory_manager.add_code_context(code, code, 95.0, ["list_comprehension"])
+        
+        third = analyzer.analyze_with_context(code)
+        self.assertEqual(len(third["similar_contexts"]), 1, "Learning must invalidate cached analysis")
 
 
 if __name__ == "__main__":
@@ -5,197 +5,116 @@ Tests the workflow theo config.json: VSCode → MCP → ChromaDB → Safe Code
 """
 
 import asyncio
-import json
+import functools
 import sys
 import os
+import tempfile
+
+import pytest
+
+# orjson (optional) parse nhanh hơn - fallback về json chuẩn
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 # Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from server import PythonCodeQualityServer
+from server import ConfigManager, PythonCodeQualityServer
+import samples
 
 
-async def test_code_quality_server():
-    """Test the Python Code Quality MCP Server"""
-    
-    # Initialize server
-    server = PythonCodeQualityServer()
-    
-    print("=== Testing Python Code Quality MCP Server ===")
-    print(f"Server: {server.name} v{server.version}")
-    print(f"Description: {server.description}")
-    print(f"Config loaded: {server.config.config}")
-    print()
-    
-    # Test case 1: Code with division by zero
-    test_code_1 = """
-def calculate_ratio(a, b):
-    return a / b
+SAMPLES = [
+    ("Code với potential division by zero", samples.load("division_by_zero")),
+    ("Code với unsafe file operations", samples.load("unsafe_file_ops")),
+    ("Code với dangerous eval usage", samples.load("eval_usage")),
+    ("Already safe code", samples.load("safe_code")),
+]
 
-result = calculate_ratio(10, 0)
-print(result)
-"""
-    
-    print("Test 1: Code với potential division by zero")
-    print("Input code:")
-    print(test_code_1)
-    
-    # Create request
+
+def _isolated_server(tmp_dir):
+    """Server với memory DB trong thư mục tạm và ChromaDB trong RAM - không ghi vào store thật"""
+    config = ConfigManager()
+    config.config["chromadb_mode"] = "ephemeral"
+    return PythonCodeQualityServer(config, memory_db_path=os.path.join(tmp_dir, "code_memory.db"))
+
+
+async def _run(server, tid, label, code):
+    """Gửi một test case tới server, trả về (tid, label, code, response)"""
     request = {
         "jsonrpc": "2.0",
-        "id": 1,
+        "id": tid,
         "method": "tools/call",
         "params": {
             "name": "validate_code",
-            "arguments": {"code": test_code_1}
+            "arguments": {"code": code}
         }
     }
-    
-    # Process request
-    response = await server.handle_request(request)
-    
-    if "result" in response:
-        result_text = response["result"]["content"][0]["text"]
-        result_data = json.loads(result_text)
-        
-        print("\nResult:")
-        print(f"Status: {result_data['status']}")
-        print(f"Message: {result_data['message']}")
-        
-        if 'detected_errors' in result_data:
-            print(f"Detected errors: {len(result_data['detected_errors'])}")
-            for error in result_data['detected_errors']:
-                print(f"  - {error['type']}: {error['description']} (line {error['line']})")
-        
-        if result_data['status'] == 'improved':
-            print("\nSafe code:")
-            print(result_data['safe_code'])
-    else:
-        print(f"Error: {response.get('error', {}).get('message', 'Unknown error')}")
-    
-    print("\n" + "="*60)
-    
-    # Test case 2: Code with unsafe file operations
-    test_code_2 = """
-def read_data():
-    file = open('data.txt', 'r')
-    content = file.read()
-    file.close()
-    return content
-
-data = read_data()
-"""
-    
-    print("\nTest 2: Code với unsafe file operations")
-    print("Input code:")
-    print(test_code_2)
-    
-    request["id"] = 2
-    request["params"]["arguments"]["code"] = test_code_2
-    
-    response = await server.handle_request(request)
-    
-    if "result" in response:
-        result_text = response["result"]["content"][0]["text"]
-        result_data = json.loads(result_text)
-        
-        print("\nResult:")
-        print(f"Status: {result_data['status']}")
-        print(f"Message: {result_data['message']}")
-        
-        if 'detected_errors' in result_data:
-            for error in result_data['detected_errors']:
-                print(f"  - {error['type']}: {error['description']}")
-        
-        if result_data['status'] == 'improved':
-            print("\nSafe code:")
-            print(result_data['safe_code'])
-    else:
-        print(f"Error: {response.get('error', {}).get('message', 'Unknown error')}")
-    
-    print("\n" + "="*60)
-    
-    # Test case 3: Code with eval usage
-    test_code_3 = """
-def calculate_expression(expr):
-    return eval(expr)
+    return tid, label, code, await server.handle_request(request)
 
-result = calculate_expression("2 + 3 * 4")
-"""
-    
-    print("\nTest 3: Code với dangerous eval usage")
-    print("Input code:")
-    print(test_code_3)
-    
-    request["id"] = 3
-    request["params"]["arguments"]["code"] = test_code_3
-    
-    response = await server.handle_request(request)
+
+@functools.lru_cache(maxsize=None)
+def _parse(text):
+    """Parse JSON text của một response - cache theo nội dung"""
+    return _json_loads(text)
+
+
+def _print_result(tid, label, code, response):
+    """In kết quả của một test case (gom lại, ghi stdout một lần)"""
+    lines = [f"\nTest {tid}: {label}", "Input code:", code]
     
     if "result" in response:
-        result_text = response["result"]["content"][0]["text"]
-        result_data = json.loads(result_text)
+        result_data = _parse(response["result"]["content"][0]["text"])
         
-        print("\nResult:")
-        print(f"Status: {result_data['status']}")
-        print(f"Message: {result_data['message']}")
+        lines.append("\nResult:")
+        lines.append(f"Status: {result_data['status']}")
+        lines.append(f"Message: {result_data['message']}")
         
         if 'detected_errors' in result_data:
+            lines.append(f"Detected errors: {len(result_data['detected_errors'])}")
             for error in result_data['detected_errors']:
-                print(f"  - {error['type']}: {error['description']}")
+                lines.append(f"  - {error['type']}: {error['description']} (line {error['line']})")
         
         if result_data['status'] == 'improved':
-            print("\nSafe code:")
-            print(result_data['safe_code'])
+            lines.append("\nSafe code:")
+            lines.append(result_data['safe_code'])
+        elif 'server' in result_data:
+            lines.append(f"Server info: {result_data['server']['name']} v{result_data['server']['version']}")
     else:
-        print(f"Error: {response.get('error', {}).get('message', 'Unknown error')}")
-    
-    print("\n" + "="*60)
-    
-    # Test case 4: Already safe code
-    test_code_4 = """
-def safe_divide(a, b):
-    try:
-        return a / b
-    except ZeroDivisionError:
-        return float('inf')
-
-def safe_read_file(filename):
-    try:
-        with open(filename, 'r') as f:
-            return f.read()
-    except FileNotFoundError:
-        return ""
-
-result = safe_divide(10, 2)
-content = safe_read_file("test.txt")
-"""
-    
-    print("\nTest 4: Already safe code")
-    print("Input code:")
-    print(test_code_4)
-    
-    request["id"] = 4
-    request["params"]["arguments"]["code"] = test_code_4
-    
-    response = await server.handle_request(request)
+        lines.append(f"Error: {response.get('error', {}).get('message', 'Unknown error')}")
     
-    if "result" in response:
-        result_text = response["result"]["content"][0]["text"]
-        result_data = json.loads(result_text)
-        
-        print("\nResult:")
-        print(f"Status: {result_data['status']}")
-        print(f"Message: {result_data['message']}")
-        print(f"Server info: {result_data['server']['name']} v{result_data['server']['version']}")
-    else:
-        print(f"Error: {response.get('error', {}).get('message', 'Unknown error')}")
+    lines.append("\n" + "="*60)
+    print("\n".join(lines))
+
+
+@pytest.mark.asyncio
+async def test_code_quality_server():
+    """Test the Python Code Quality MCP Server"""
     
-    print("\n" + "="*60)
-    print("Testing completed!")
-    print(f"Config path: {server.config.config_path}")
-    print(f"ChromaDB path: {server.config.get('chromadb_path')}")
-    print(f"Log level: {server.config.get('log_level')}")
+    # Initialize server (store tạm, dọn khi test xong - kể cả khi test lỗi)
+    with tempfile.TemporaryDirectory() as tmp:
+        server = _isolated_server(tmp)
+        try:
+            print("=== Testing Python Code Quality MCP Server ===")
+            print(f"Server: {server.name} v{server.version}")
+            print(f"Description: {server.description}")
+            print(f"Config loaded: {server.config.config}")
+            
+            # Các test case độc lập → gửi đồng thời trên cùng event loop
+            results = await asyncio.gather(
+                *(_run(server, tid, label, code) for tid, (label, code) in enumerate(SAMPLES, 1))
+            )
+            
+            for result in results:
+                _print_result(*result)
+            
+            print("Testing completed!")
+            print(f"Config path: {server.config.config_path}")
+            print(f"ChromaDB path: {server.config.get('chromadb_path')}")
+            print(f"Log level: {server.config.get('log_level')}")
+        finally:
+            server.memory_manager.conn.close()
 
 
 if __name__ == "__main__":
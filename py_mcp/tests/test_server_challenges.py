@@ -9,71 +9,22 @@ Nguyên tắc Darwin:
 - Challenge mọi assumption
 """
 
-import unittest
 import asyncio
-import json
-import os
-import sys
-import tempfile
-import sqlite3
-from pathlib import Path
+from typing import Final
 
-# Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pytest
+from hypothesis import HealthCheck, given, settings
+from hypothesis import strategies as st
 
+# src đã nằm trong sys.path qua conftest.py
 from server import (
-    PythonCodeQualityServer, 
-    CodeMemoryManager, 
-    EnhancedCodeAnalyzer,
-    ChromaDBManager,
+    PythonCodeQualityServer,
     ConfigManager
 )
 
 
-class TestServerAssumptions(unittest.TestCase):
-    """
-    CHẤT VẤN các giả định cơ bản của server
-    """
-    
-    def setUp(self):
-        """Setup test environment với isolated database"""
-        self.temp_dir = tempfile.mkdtemp()
-        self.test_db = os.path.join(self.temp_dir, "test_memory.db")
-        
-        # Mock config để tránh conflicts
-        self.config = ConfigManager()
-        self.config.config = {
-            "chromadb_path": self.temp_dir,
-            "log_level": "ERROR",  # Reduce noise
-            "server": {
-                "name": "test-server",
-                "version": "test",
-                "description": "Test server"
-            }
-        }
-    
-    def tearDown(self):
-        """Cleanup test data"""
-        import shutil
-        try:
-            shutil.rmtree(self.temp_dir)
-        except:
-            pass
-
-
-class TestQualityScoreBias(TestServerAssumptions):
-    """
-    HYPOTHESIS: Quality score có thể misleading và biased
-    FALSIFY: Tìm cases where "low quality score" = "better code"
-    """
-    
-    def test_performance_vs_quality_paradox(self):
-        """Test: Code hiệu quả nhưng quality score thấp"""
-        memory_manager = CodeMemoryManager(self.test_db)
-        analyzer = EnhancedCodeAnalyzer(memory_manager)
-        
-        # Code "xấu" nhưng hiệu quả
-        fast_code = """
+# Code "xấu" nhưng hiệu quả
+_FAST_CODE: Final = """
 # No docstring, no type hints, "magic numbers"
 def fib(n):
     a, b = 0, 1
@@ -81,9 +32,9 @@ def fib(n):
         a, b = b, a + b
     return a
 """
-        
-        # Code "đẹp" nhưng chậm
-        slow_code = """
+
+# Code "đẹp" nhưng chậm
+_SLOW_CODE: Final = """
 from typing import Dict
 import functools
 
@@ -106,28 +57,9 @@ def fibonacci_perfect(n: int) -> int:
         return n
     return fibonacci_perfect(n-1) + fibonacci_perfect(n-2)
 """
-        
-        fast_analysis = analyzer.analyze_with_context(fast_code)
-        slow_analysis = analyzer.analyze_with_context(slow_code)
-        
-        # CHALLENGE: Server có đánh giá đúng performance không?
-        print(f"Fast code quality: {fast_analysis['quality_score']}")
-        print(f"Slow code quality: {slow_analysis['quality_score']}")
-        
-        # PARADOX: Slow code sẽ có score cao hơn!
-        self.assertGreater(
-            slow_analysis['quality_score'], 
-            fast_analysis['quality_score'],
-            "PARADOX CONFIRMED: 'Beautiful' slow code gets higher score than fast code"
-        )
-    
-    def test_readability_vs_performance_trade_off(self):
-        """Test: Code readable vs code optimized"""
-        memory_manager = CodeMemoryManager(self.test_db)
-        analyzer = EnhancedCodeAnalyzer(memory_manager)
-        
-        # Readable but slow
-        readable_code = """
+
+# Readable but slow
+_READABLE_CODE: Final = """
 def process_large_dataset(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     '''Process large dataset with proper error handling'''
     result = []
@@ -145,36 +77,16 @@ def process_large_dataset(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             continue
     return result
 """
-        
-        # Optimized but less readable
-        optimized_code = """
+
+# Optimized but less readable
+_OPTIMIZED_CODE: Final = """
 def process_large_dataset_fast(data):
     return [{'id': i['id'], 'value': i['value'] * 2, 'timestamp': i['timestamp']} 
             for i in data if i.get('status') == 'active']
 """
-        
-        readable_analysis = analyzer.analyze_with_context(readable_code)
-        optimized_analysis = analyzer.analyze_with_context(optimized_code)
-        
-        # Server bias towards "verbose = good"?
-        print(f"Readable code: {readable_analysis['quality_score']}")
-        print(f"Optimized code: {optimized_analysis['quality_score']}")
-        
-        # QUESTION: Which is actually better for production?
-
 
-class TestMemorySystemFlaws(TestServerAssumptions):
-    """
-    HYPOTHESIS: Memory system có thể gây harm hơn help
-    FALSIFY: Tìm cases where historical context misleads
-    """
-    
-    def test_outdated_context_pollution(self):
-        """Test: Context cũ có thể gây suggestions sai"""
-        memory_manager = CodeMemoryManager(self.test_db)
-        
-        # Thêm "best practice" cũ
-        old_code = """
+# "Best practice" cũ (Python 2 style)
+_OLD_CODE: Final = """
 # Python 2 style - was good in 2010
 def read_file(filename):
     try:
@@ -185,64 +97,16 @@ def read_file(filename):
     except IOError:
         return None
 """
-        memory_manager.add_code_context(old_code, old_code, 90.0, ["file_handling"])
-        
-        # Code hiện đại
-        modern_code = """
+
+# Code hiện đại
+_MODERN_CODE: Final = """
 def read_file(filename):
     with open(filename, 'r') as f:
         return f.read()
 """
-        
-        similar_contexts = memory_manager.get_similar_contexts(modern_code)
-        
-        # DANGER: Old context có thể mislead
-        if similar_contexts:
-            old_context = similar_contexts[0]
-            self.assertIn("f.close()", old_context["original"])
-            print("WARNING: Old context suggests manual file closing!")
-    
-    def test_context_bias_amplification(self):
-        """Test: Memory system có amplify bias không?"""
-        memory_manager = CodeMemoryManager(self.test_db)
-        
-        # Thêm nhiều examples với same bias
-        biased_examples = [
-            "def func(): pass  # Simple function",
-            "def another(): pass  # Another simple",
-            "def third(): pass  # Third simple"
-        ]
-        
-        for code in biased_examples:
-            memory_manager.add_code_context(code, code, 85.0, ["simple"])
-        
-        # Test với complex function
-        complex_code = """
-def complex_function(data: List[Dict], config: Config) -> ProcessedResult:
-    '''Complex but necessary function'''
-    # Complex logic here...
-    pass
-"""
-        
-        recommendations = memory_manager.get_quality_recommendations(["complexity"])
-        
-        # BIAS: System có prefer simplicity over necessity?
-        print(f"Recommendations for complex code: {len(recommendations)}")
 
-
-class TestPatternRecognitionFailures(TestServerAssumptions):
-    """
-    HYPOTHESIS: Pattern recognition có thể miss important issues
-    FALSIFY: Tìm critical bugs mà server bỏ qua
-    """
-    
-    def test_security_vulnerabilities_missed(self):
-        """Test: Server có miss security issues không?"""
-        memory_manager = CodeMemoryManager(self.test_db)
-        analyzer = EnhancedCodeAnalyzer(memory_manager)
-        
-        # Code có security vulnerabilities nhưng "clean"
-        vulnerable_code = """
+# Code có security vulnerabilities nhưng "clean"
+_VULNERABLE_CODE: Final = """
 import os
 import subprocess
 from typing import str
@@ -263,28 +127,9 @@ def read_sensitive_file(filename: str) -> str:
     with open(full_path, 'r') as f:
         return f.read()
 """
-        
-        analysis = analyzer.analyze_with_context(vulnerable_code)
-        
-        # CRITICAL: Server có detect được security issues không?
-        security_errors = [e for e in analysis['errors'] 
-                          if 'injection' in e['description'].lower() 
-                          or 'traversal' in e['description'].lower()]
-        
-        print(f"Security errors detected: {len(security_errors)}")
-        print(f"Quality score: {analysis['quality_score']}")
-        
-        # FAILURE: Code vulnerable nhưng có thể có score cao
-        if analysis['quality_score'] > 70:
-            print("DANGER: Vulnerable code got high quality score!")
-    
-    def test_logical_errors_in_beautiful_code(self):
-        """Test: Server có detect logical errors không?"""
-        memory_manager = CodeMemoryManager(self.test_db)
-        analyzer = EnhancedCodeAnalyzer(memory_manager)
-        
-        # Code syntax perfect nhưng logic sai
-        buggy_code = """
+
+# Code syntax perfect nhưng logic sai
+_BUGGY_CODE: Final = """
 from typing import List, Optional
 import logging
 
@@ -315,39 +160,197 @@ def find_maximum_value(numbers: List[int]) -> Optional[int]:
     logging.info(f"Found maximum value: {max_value}")
     return max_value
 """
+
+# Code hoàn toàn OK nhưng có thể bị flag
+_GOOD_CODE: Final = """
+# Configuration constants - NOT magic numbers
+MAX_RETRIES = 3
+TIMEOUT_SECONDS = 30
+API_VERSION = "v1"
+
+def robust_api_call(url: str) -> Optional[Dict]:
+    '''Make API call with proper error handling'''
+    for attempt in range(MAX_RETRIES):
+        try:
+            response = requests.get(url, timeout=TIMEOUT_SECONDS)
+            if response.status_code == 200:
+                return response.json()
+        except requests.RequestException as e:
+            if attempt == MAX_RETRIES - 1:
+                logging.error(f"API call failed after {MAX_RETRIES} attempts: {e}")
+                return None
+            time.sleep(2 ** attempt)  # Exponential backoff
+    return None
+"""
+
+# Nhiều examples với same bias: 3-50 hàm "simple" một dòng
+_BIASED_EXAMPLES = st.lists(
+    st.integers(min_value=0, max_value=1000).map(lambda i: f"def f_{i}(): pass  # Simple function"),
+    min_size=3,
+    max_size=50,
+)
+
+# (code_a, code_b, relation, message) - relation "gt"/"lt": score của code_b cao hơn/thấp hơn code_a
+QUALITY_BIAS_CASES = [
+    pytest.param(_FAST_CODE, _SLOW_CODE, "gt",
+                 "PARADOX CONFIRMED: 'Beautiful' slow code gets higher score than fast code",
+                 id="performance_vs_quality_paradox"),
+    pytest.param(_READABLE_CODE, _OPTIMIZED_CODE, "lt",
+                 "BIAS CONFIRMED: verbose code gets higher score than the optimized one-liner",
+                 id="readability_vs_performance_trade_off"),
+]
+
+
+@pytest.fixture(scope="session")
+def darwin_env(tmp_path_factory):
+    """
+    Config cho test environment cô lập - memory/analyzer dùng chung nằm trong conftest.py
+    tmp_path_factory cấp thư mục riêng cho mỗi xdist worker nên các worker chạy song song không đụng nhau
+    """
+    temp_dir = tmp_path_factory.mktemp("darwin")
+    
+    # Mock config để tránh conflicts
+    config = ConfigManager()
+    config.config = {
+        "chromadb_path": str(temp_dir),
+        # Chroma trong RAM, HNSW nhỏ - test chỉ kiểm tra hành vi định tính
+        "chromadb_mode": "ephemeral",
+        "chromadb_hnsw": {"hnsw:M": 8, "hnsw:construction_ef": 20},
+        "log_level": "ERROR",  # Reduce noise
+        "server": {
+            "name": "test-server",
+            "version": "test",
+            "description": "Test server"
+        }
+    }
+    return config
+
+
+@pytest.fixture(scope="session")
+def server(darwin_env, tmp_path_factory):
+    """PythonCodeQualityServer chỉ tạo qua fixture - một instance cho mỗi xdist worker"""
+    # Memory DB của server nằm trong thư mục tạm của worker, không đụng py_mcp/code_memory.db
+    memory_db = tmp_path_factory.mktemp("memory") / "code_memory.db"
+    server = PythonCodeQualityServer(darwin_env, memory_db_path=str(memory_db))
+    yield server
+    server.memory_manager.conn.close()
+
+
+class TestQualityScoreBias:
+    """
+    HYPOTHESIS: Quality score có thể misleading và biased
+    FALSIFY: Tìm cases where "low quality score" = "better code"
+    """
+    
+    @pytest.mark.profile
+    @pytest.mark.parametrize("code_a, code_b, relation, message", QUALITY_BIAS_CASES)
+    def test_quality_bias(self, warm_analyzer, code_a, code_b, relation, message):
+        """Test: Code hiệu quả/gọn nhưng quality score thấp hơn code "đẹp"?"""
+        score_a = warm_analyzer.analyze_with_context(code_a)['quality_score']
+        score_b = warm_analyzer.analyze_with_context(code_b)['quality_score']
+        
+        # CHALLENGE: Server có đánh giá đúng performance không?
+        # PARADOX: Code "đẹp"/dài dòng sẽ có score cao hơn!
+        if relation == "gt":
+            assert score_b > score_a, f"{message} ({score_b} <= {score_a})"
+        else:
+            assert score_b < score_a, f"{message} ({score_b} >= {score_a})"
+
+
+class TestMemorySystemFlaws:
+    """
+    HYPOTHESIS: Memory system có thể gây harm hơn help
+    FALSIFY: Tìm cases where historical context misleads
+    """
+    
+    def test_outdated_context_pollution(self, clean_analyzer):
+        """Test: Context cũ có thể gây suggestions sai"""
+        memory_manager = clean_analyzer.memory_manager
+        
+        # Thêm "best practice" cũ
+        memory_manager.add_code_context(_OLD_CODE, _OLD_CODE, 90.0, ["file_handling"])
         
-        analysis = analyzer.analyze_with_context(buggy_code)
+        similar_contexts = memory_manager.get_similar_contexts(_MODERN_CODE)
+        
+        # DANGER: Old context (đóng file thủ công) được gợi ý cho code dùng context manager
+        if any("f.close()" in context["original_code"] for context in similar_contexts):
+            pytest.xfail("LIMITATION: outdated context suggests manual file closing")
+    
+    # clean_analyzer chỉ reset sau cả test → tự reset đầu mỗi example của Hypothesis
+    @settings(max_examples=25, deadline=500, suppress_health_check=[HealthCheck.function_scoped_fixture])
+    @given(biased_examples=_BIASED_EXAMPLES)
+    def test_context_bias_amplification(self, clean_analyzer, biased_examples):
+        """Test: Memory system có amplify bias không?"""
+        memory_manager = clean_analyzer.memory_manager
+        memory_manager.reset()
+        
+        # Thêm nhiều examples với same bias
+        # Một transaction cho cả lô thay vì commit từng context
+        memory_manager.add_code_contexts_bulk([(code, code, 85.0, ["simple"]) for code in biased_examples])
+        assert memory_manager.get_context_insights()["total_contexts"] == len(biased_examples)
+        
+        # Mỗi example đếm đúng một lần - bulk insert không nhân bản hay làm rơi pattern
+        recommendations = memory_manager.get_quality_recommendations(["simple"])
+        assert [(r["type"], r["frequency"]) for r in recommendations] == [("simple", len(biased_examples))]
+        
+        # BIAS: Examples "simple" không được lọt vào recommendations cho complex code
+        leaked = memory_manager.get_quality_recommendations(["complexity"])
+        assert not leaked, f"Biased patterns leaked into complexity recommendations: {leaked}"
+
+
+class TestPatternRecognitionFailures:
+    """
+    HYPOTHESIS: Pattern recognition có thể miss important issues
+    FALSIFY: Tìm critical bugs mà server bỏ qua
+    """
+    
+    def test_security_vulnerabilities_missed(self, warm_analyzer):
+        """Test: Server có miss security issues không?"""
+        # Chỉ cần output của rule tĩnh - bỏ qua tra cứu memory
+        analysis = warm_analyzer.analyze_with_context(_VULNERABLE_CODE, skip_memory=True)
+        
+        # CRITICAL: Server có detect được security issues không?
+        security_errors = [e for e in analysis['errors'] 
+                          if 'injection' in e['description'].lower() 
+                          or 'traversal' in e['description'].lower()]
+        
+        # FAILURE: Code vulnerable nhưng có thể có score cao
+        assert analysis['quality_score'] <= 70, \
+            f"DANGER: Vulnerable code scored {analysis['quality_score']}"
+        
+        if not security_errors:
+            pytest.xfail("LIMITATION: command injection / path traversal not detected")
+    
+    def test_logical_errors_in_beautiful_code(self, warm_analyzer):
+        """Test: Server có detect logical errors không?"""
+        analysis = warm_analyzer.analyze_with_context(_BUGGY_CODE, skip_memory=True)
         
         # CHALLENGE: Server có detect logic bug không?
         logic_errors = [e for e in analysis['errors'] 
                        if 'logic' in e['description'].lower()]
         
-        print(f"Logic errors detected: {len(logic_errors)}")
-        print(f"Quality score: {analysis['quality_score']}")
-        
         # LIMITATION: Server likely misses logic bugs
+        if not logic_errors:
+            pytest.xfail(f"LIMITATION: inverted comparison not detected (score {analysis['quality_score']})")
 
 
-class TestServerIntegrationReality(TestServerAssumptions):
+# Mọi test async trong class chạy trên một event loop chung (không tạo/đóng loop cho từng test)
+@pytest.mark.asyncio(loop_scope="class")
+class TestServerIntegrationReality:
     """
     HYPOTHESIS: Server integration sẽ work trong real world
     FALSIFY: Test real-world scenarios where it fails
     """
     
-    async def test_large_codebase_performance(self):
-        """Test: Server có handle được large files không?"""
-        # Generate large code file
-        large_code = "\n".join([
-            f"def function_{i}():",
-            f"    '''Function number {i}'''",
-            f"    return {i} * 2",
-            ""
-        ] for i in range(1000))
-        
-        server = PythonCodeQualityServer()
-        
+    CONCURRENT_REQUESTS = 20
+    
+    @pytest.mark.benchmark
+    @pytest.mark.profile
+    @pytest.mark.parametrize("large_code", [100, 1000, 10000], indirect=True)
+    async def test_large_codebase_performance(self, server, large_code):
+        """Test: Server có handle được large files không? (scale theo số hàm)"""
         import time
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         request = {
             "jsonrpc": "2.0",
@@ -361,141 +364,51 @@ class TestServerIntegrationReality(TestServerAssumptions):
         
         try:
             response = await server.handle_request(request)
-            end_time = time.time()
-            
-            processing_time = end_time - start_time
-            print(f"Large file processing time: {processing_time:.2f}s")
-            
-            # PERFORMANCE CHALLENGE
-            if processing_time > 5.0:
-                print("WARNING: Too slow for real-world usage!")
-                
         except Exception as e:
-            print(f"FAILURE: Server crashed on large file: {e}")
+            pytest.fail(f"FAILURE: Server crashed on large file: {e}")
+        
+        processing_time = time.perf_counter() - start_time
+        assert "result" in response, f"Large file request failed: {response.get('error')}"
+        
+        # PERFORMANCE CHALLENGE
+        assert processing_time <= 5.0, f"Too slow for real-world usage: {processing_time:.2f}s"
     
-    def test_concurrent_requests_handling(self):
+    async def test_concurrent_requests_handling(self, server):
         """Test: Server có handle concurrent requests không?"""
-        # This would need async testing framework
-        # Left as exercise for real testing
-        pass
+        requests = [
+            {
+                "jsonrpc": "2.0",
+                "id": i,
+                "method": "tools/call",
+                "params": {
+                    "name": "validate_code",
+                    "arguments": {"code": f"value_{i} = {i} * 2\n"}
+                }
+            }
+            for i in range(self.CONCURRENT_REQUESTS)
+        ]
+        
+        responses = await asyncio.gather(*(server.handle_request(r) for r in requests))
+        
+        # Mỗi response phải khớp đúng request của nó, không request nào bị nuốt
+        assert [r["id"] for r in responses] == list(range(self.CONCURRENT_REQUESTS))
+        failed = [r for r in responses if "result" not in r]
+        assert not failed, f"Concurrent requests failed: {failed}"
 
 
-class TestFalsePositivesNegatives(TestServerAssumptions):
+class TestFalsePositivesNegatives:
     """
     HYPOTHESIS: Server có accuracy cao
     FALSIFY: Tìm false positives và false negatives
     """
     
-    def test_false_positive_detection(self):
+    def test_false_positive_detection(self, warm_analyzer):
         """Test: Server có báo lỗi sai không?"""
-        memory_manager = CodeMemoryManager(self.test_db)
-        analyzer = EnhancedCodeAnalyzer(memory_manager)
-        
-        # Code hoàn toàn OK nhưng có thể bị flag
-        good_code = """
-# Configuration constants - NOT magic numbers
-MAX_RETRIES = 3
-TIMEOUT_SECONDS = 30
-API_VERSION = "v1"
-
-def robust_api_call(url: str) -> Optional[Dict]:
-    '''Make API call with proper error handling'''
-    for attempt in range(MAX_RETRIES):
-        try:
-            response = requests.get(url, timeout=TIMEOUT_SECONDS)
-            if response.status_code == 200:
-                return response.json()
-        except requests.RequestException as e:
-            if attempt == MAX_RETRIES - 1:
-                logging.error(f"API call failed after {MAX_RETRIES} attempts: {e}")
-                return None
-            time.sleep(2 ** attempt)  # Exponential backoff
-    return None
-"""
-        
-        analysis = analyzer.analyze_with_context(good_code)
+        analysis = warm_analyzer.analyze_with_context(_GOOD_CODE)
         
-        # FALSE POSITIVE check
-        false_errors = []
-        for error in analysis['errors']:
-            if error['type'] == 'magic_numbers':
-                if any(num in error['match'] for num in ['3', '30', '200', '2']):
-                    false_errors.append(error)
+        # FALSE POSITIVE check: _GOOD_CODE không có lỗi thật - mọi lỗi báo ra đều là báo sai
+        false_errors = analysis['errors']
         
-        if false_errors:
-            print(f"FALSE POSITIVES found: {len(false_errors)}")
-            for err in false_errors:
-                print(f"  - {err['description']}: {err['match']}")
-
-
-def run_darwin_tests():
-    """
-    Chạy tất cả tests để CHALLENGE server
-    """
-    print("🔬 RUNNING DARWIN TESTS - Challenging All Assumptions")
-    print("="*60)
-    
-    # Tạo test suite
-    test_classes = [
-        TestQualityScoreBias,
-        TestMemorySystemFlaws, 
-        TestPatternRecognitionFailures,
-        TestFalsePositivesNegatives
-    ]
-    
-    results = {
-        "total_tests": 0,
-        "failures": 0,
-        "paradoxes_found": [],
-        "limitations_discovered": []
-    }
-    
-    for test_class in test_classes:
-        print(f"\n📊 Testing: {test_class.__name__}")
-        print("-" * 40)
-        
-        suite = unittest.TestLoader().loadTestsFromTestCase(test_class)
-        runner = unittest.TextTestRunner(verbosity=2)
-        result = runner.run(suite)
-        
-        results["total_tests"] += result.testsRun
-        results["failures"] += len(result.failures) + len(result.errors)
-        
-        # Collect insights
-        if result.failures:
-            results["paradoxes_found"].extend([f[0].id() for f in result.failures])
-        if result.errors:
-            results["limitations_discovered"].extend([e[0].id() for e in result.errors])
-    
-    print("\n" + "="*60)
-    print("🎯 DARWIN TEST RESULTS")
-    print(f"Total tests run: {results['total_tests']}")
-    print(f"Failures/Errors: {results['failures']}")
-    print(f"Paradoxes found: {len(results['paradoxes_found'])}")
-    print(f"Limitations discovered: {len(results['limitations_discovered'])}")
-    
-    if results['failures'] > 0:
-        print("\n🚨 CRITICAL FINDINGS:")
-        print("- Server assumptions challenged successfully")
-        print("- Multiple failure modes discovered")
-        print("- False confidence in quality metrics")
-        
-    return results
-
-
-if __name__ == "__main__":
-    # Run the Darwin test suite
-    results = run_darwin_tests()
-    
-    print("\n" + "="*60)
-    print("🧬 CONCLUSION: Darwin Analysis")
-    print("="*60)
-    print("✅ Tests created to FALSIFY server assumptions")
-    print("✅ Multiple challenge scenarios implemented")
-    print("✅ Real-world failure modes identified")
-    print("\n📋 RECOMMENDED ACTIONS:")
-    print("1. Run these tests regularly")
-    print("2. Add more adversarial test cases") 
-    print("3. Compare with human expert evaluations")
-    print("4. Measure real-world impact vs lab performance")
-    print("5. Question every 'improvement' metric")
+        assert not analysis['has_errors'] and not false_errors, "FALSE POSITIVES found: " + ", ".join(
+            f"{err['type']} (line {err['line']}): {err['description']}" for err in false_errors
+        )